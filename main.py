@@ -1,17 +1,68 @@
-from fastapi import FastAPI, HTTPException, Header
+from fastapi import FastAPI, HTTPException, Header, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from web3 import Web3
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from web3 import Web3, AsyncWeb3, AsyncHTTPProvider, WebSocketProvider
+from web3.providers.rpc.utils import ExceptionRetryConfiguration
+from web3.exceptions import ContractLogicError, TimeExhausted, TransactionNotFound, Web3Exception
+from web3.types import FeeHistory, RPCResponse, TxParams, TxReceipt
+from web3.datastructures import AttributeDict
+from hexbytes import HexBytes
 from eth_account import Account
+from eth_utils import function_signature_to_4byte_selector
+from cachetools import TTLCache
+import redis.asyncio as aioredis
+import aiohttp
+import orjson
+from contextlib import asynccontextmanager
+from collections.abc import Callable
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+from uuid import uuid4
 import os
-from datetime import datetime
 import logging
 import time
+import asyncio
+import functools
+import re
+import heapq
+import statistics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Ultra Backend V12 - Production Ready")
+# Log separators, built once
+_BANNER = "═" * 50
+_RULE = "=" * 50
+_TX_RULE = "   " + "=" * 40
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect to the chain once the event loop is running; close network resources on shutdown"""
+    global web3_ready
+    logger.info("🚀 Starting Ultra Backend V12...")
+    web3_ready = await init_web3()
+    if web3_ready:
+        logger.info("✅ Backend is READY for withdrawals!")
+    else:
+        logger.error("❌ Backend NOT ready - check environment variables")
+    
+    yield
+    
+    if _head_watcher is not None:
+        _head_watcher.cancel()
+    for watcher in list(_unconfirmed_watchers):
+        watcher.cancel()
+    if rpc_session is not None:
+        await rpc_session.close()
+    if redis_client is not None:
+        await redis_client.aclose()
+
+app = FastAPI(title="Ultra Backend V12 - Production Ready", default_response_class=ORJSONResponse, lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
+# Compress larger JSON bodies (/, /api/contracts, /api/health); small ones aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=512)
 
 # 🔐 ADMIN WALLET CONFIGURATION - Dual Method Support
 
@@ -24,6 +75,31 @@ ADMIN_PRIVATE_KEY = os.getenv('ADMIN_PRIVATE_KEY', "")
 ALCHEMY_KEY = os.getenv("ALCHEMY_API_KEY", "")
 NETWORK = os.getenv("NETWORK", "mainnet")
 
+# Send grouped RPC reads as a single JSON-RPC batch (disable for providers that bill batches per call anyway)
+RPC_BATCHING = os.getenv("RPC_BATCHING", "true").lower() == "true"
+
+# Resolve tx receipts from one shared newHeads WebSocket subscription instead of per-tx polling
+WS_RECEIPTS = os.getenv("WS_RECEIPTS", "true").lower() == "true"
+
+# Broadcast with eth_sendRawTransactionSync (EIP-7966) so the receipt comes back with the send;
+# switched off automatically if the node doesn't support it
+SEND_RAW_SYNC = os.getenv("SEND_RAW_SYNC", "true").lower() == "true"
+
+# What a failed read against the RPC node can raise - status endpoints degrade to null on these
+RPC_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError, Web3Exception, ValueError)
+
+# Max concurrent keep-alive connections to the RPC provider
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 50))
+# Retries after a dropped connection or timeout on top of the first attempt (0 disables retrying)
+RPC_RETRIES = int(os.getenv("RPC_RETRIES", 3))
+
+# Admin gas thresholds, compared in wei - balances only become floats for logs and responses
+_ETH = 10 ** 18
+_GAS_PER_WITHDRAWAL = 10 ** 15  # ~0.001 ETH, also the minimum to accept a withdrawal
+_GAS_CRITICAL = 5 * 10 ** 15    # 0.005 ETH
+_GAS_HEALTHY = 10 ** 16         # 0.01 ETH
+_GAS_LOW = 2 * 10 ** 16         # 0.02 ETH
+
 # All 3 production contracts - HARDCODED
 CONTRACTS = [
     {"id": 1, "name": "Primary", "address": "0x29983BE497D4c1D39Aa80D20Cf74173ae81D2af5"},
@@ -31,13 +107,65 @@ CONTRACTS = [
     {"id": 3, "name": "Tertiary", "address": "0xf97A395850304b8ec9B8f9c80A17674886612065"}
 ]
 
+# Lowercase address -> contract fallback order with that contract first, built once
+# so a withdrawal's preferred contract is a single dict lookup
+CONTRACT_ORDERS = {
+    c["address"].lower(): [c] + [other for other in CONTRACTS if other is not c]
+    for c in CONTRACTS
+}
+
 web3_instance = None
 admin_account = None
 admin_private_key = None
 admin_address = None
+chain_id = 1
+rpc_session = None
+tx_template = {}  # Fields shared by every admin tx (from, chainId, type) - set once connected
+
+@functools.lru_cache(maxsize=10_000)
+def _checksum_lower(address_lower: str) -> str:
+    return Web3.to_checksum_address(address_lower)
+
+def checksum_address(address: str) -> str:
+    """Checksum an address, memoized on its lowercase form (skips a keccak256 for repeat wallets)"""
+    return _checksum_lower(address.lower())
+
+def _orjson_default(obj):
+    """orjson fallback for the web3 types stdlib json gets from Web3JsonEncoder"""
+    if isinstance(obj, (bytes, bytearray)):
+        return HexBytes(obj).to_0x_hex()
+    if isinstance(obj, AttributeDict):
+        return dict(obj)
+    raise TypeError
 
-def init_web3():
-    global web3_instance, admin_account, admin_private_key, admin_address
+# A JSON integer literal of 20+ digits may not fit 64 bits - orjson would decode it to a lossy float
+_BIG_INT_LITERAL = re.compile(rb'[\[:,]\s*-?\d{20,}')
+
+class OrjsonHTTPProvider(AsyncHTTPProvider):
+    """
+    AsyncHTTPProvider that encodes requests and decodes responses (batches
+    included) with orjson. Payloads with integers over 64 bits go through
+    web3's stdlib codec instead - orjson rejects them when encoding and
+    would turn them into floats when decoding.
+    """
+    @staticmethod
+    def encode_rpc_dict(rpc_dict) -> bytes:
+        try:
+            return orjson.dumps(rpc_dict, default=_orjson_default)
+        except orjson.JSONEncodeError:
+            return AsyncHTTPProvider.encode_rpc_dict(rpc_dict)
+    
+    @staticmethod
+    def decode_rpc_response(raw_response: bytes) -> RPCResponse:
+        if _BIG_INT_LITERAL.search(raw_response):
+            return AsyncHTTPProvider.decode_rpc_response(raw_response)
+        try:
+            return orjson.loads(raw_response)
+        except orjson.JSONDecodeError:
+            return AsyncHTTPProvider.decode_rpc_response(raw_response)
+
+async def init_web3():
+    global web3_instance, admin_account, admin_private_key, admin_address, chain_id, _head_watcher, rpc_session, tx_template
     
     # 🔐 STEP 1: Derive/Load Admin Wallet
     if ADMIN_SEED_PHRASE:
@@ -47,9 +175,9 @@ def init_web3():
             admin_private_key = admin_account.key.hex()
             admin_address = admin_account.address
             logger.info("✅ Wallet DERIVED from seed phrase")
-            logger.info(f"📍 Admin Address: {admin_address}")
+            logger.info("📍 Admin Address: %s", admin_address)
         except Exception as e:
-            logger.error(f"❌ Seed phrase derivation failed: {e}")
+            logger.error("❌ Seed phrase derivation failed: %s", e)
             return False
             
     elif ADMIN_PRIVATE_KEY:
@@ -59,9 +187,9 @@ def init_web3():
             admin_private_key = pk
             admin_address = admin_account.address
             logger.info("✅ Wallet loaded from private key")
-            logger.info(f"📍 Admin Address: {admin_address}")
+            logger.info("📍 Admin Address: %s", admin_address)
         except Exception as e:
-            logger.error(f"❌ Private key loading failed: {e}")
+            logger.error("❌ Private key loading failed: %s", e)
             return False
     else:
         logger.error("❌ NO WALLET CONFIGURED!")
@@ -75,66 +203,894 @@ def init_web3():
     
     try:
         rpc_url = f"https://eth-mainnet.g.alchemy.com/v2/{ALCHEMY_KEY}"
-        web3_instance = Web3(Web3.HTTPProvider(rpc_url))
+        # One keep-alive connection pool for all RPC calls, so only the first call pays the TLS handshake.
+        # Every call goes to the same host, so the DNS answer is cached for longer than aiohttp's 10s default.
+        rpc_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=RPC_POOL_SIZE,
+                limit_per_host=RPC_POOL_SIZE,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+        )
+        # Dropped connections and timeouts are retried with backoff (0.2s, 0.4s, ...); HTTP error
+        # statuses are not. web3's allowlist includes eth_sendRawTransaction - resending the same
+        # signed tx is safe, the node answers "already known", which sign_and_send treats as sent.
+        # web3's `retries` counts total attempts, and 0 attempts would return no response at all,
+        # so retrying is switched off with None instead.
+        provider = OrjsonHTTPProvider(
+            rpc_url,
+            request_kwargs={"timeout": aiohttp.ClientTimeout(total=30)},
+            exception_retry_configuration=ExceptionRetryConfiguration(
+                errors=(aiohttp.ClientConnectionError, asyncio.TimeoutError),
+                retries=RPC_RETRIES + 1,
+                backoff_factor=0.2
+            ) if RPC_RETRIES > 0 else None
+        )
+        await provider.cache_async_session(rpc_session)
+        web3_instance = AsyncWeb3(provider)
         
-        if not web3_instance.is_connected():
+        if not await web3_instance.is_connected():
             logger.error("❌ Failed to connect to Ethereum")
             return False
             
+        # Chain ID never changes for a running provider - fetch it once
+        chain_id = await web3_instance.eth.chain_id
+        # chainId is required when signing - txs are signed from this template without build_transaction
+        tx_template = {'from': admin_address, 'chainId': chain_id, 'type': 2}
+        
         logger.info("✅ Connected to Ethereum Mainnet")
-        logger.info(f"📡 RPC: {rpc_url[:50]}...")
+        logger.info("📡 RPC: %s...", rpc_url[:50])
         
         # Log all contracts
         for contract in CONTRACTS:
-            logger.info(f"📋 {contract['name']}: {contract['address']}")
+            logger.info("📋 %s: %s", contract['name'], contract['address'])
+        
+        build_token_contracts()
+        await load_token_metadata()
+        await probe_mint_support()
+        
+        try:
+            await prime_tx_state()
+        except Exception as prime_error:
+            logger.warning("⚠️ Gas/nonce priming failed, will fetch on first withdrawal: %s", prime_error)
+        
+        if WS_RECEIPTS and _head_watcher is None:
+            _head_watcher = asyncio.create_task(watch_new_heads())
         
         # Check admin balance
         try:
-            balance_wei = web3_instance.eth.get_balance(admin_address)
-            balance_eth = float(web3_instance.from_wei(balance_wei, 'ether'))
-            logger.info(f"💰 Admin ETH Balance: {balance_eth:.6f} ETH")
+            balance_wei = await web3_instance.eth.get_balance(admin_address)
+            balance_eth = balance_wei / _ETH
+            logger.info("💰 Admin ETH Balance: %.6f ETH", balance_eth)
             
-            if balance_eth < 0.005:
-                logger.error(f"❌ CRITICAL: Only {balance_eth:.6f} ETH left for gas!")
+            if balance_wei < _GAS_CRITICAL:
+                logger.error("❌ CRITICAL: Only %.6f ETH left for gas!", balance_eth)
                 logger.error("Fund admin wallet immediately!")
-            elif balance_eth < 0.02:
-                logger.warning(f"⚠️ LOW GAS: {balance_eth:.6f} ETH")
+            elif balance_wei < _GAS_LOW:
+                logger.warning("⚠️ LOW GAS: %.6f ETH", balance_eth)
             else:
-                logger.info(f"✅ Gas OK: {balance_eth:.6f} ETH (~{int(balance_eth / 0.001)} withdrawals)")
+                logger.info("✅ Gas OK: %.6f ETH (~%d withdrawals)", balance_eth, balance_wei // _GAS_PER_WITHDRAWAL)
         except Exception as e:
-            logger.error(f"⚠️ Balance check failed: {e}")
+            logger.error("⚠️ Balance check failed: %s", e)
         
         logger.info("🎉 Backend initialization COMPLETE!")
         return True
         
     except Exception as error:
-        logger.error(f"❌ Web3 initialization failed: {error}")
+        logger.error("❌ Web3 initialization failed: %s", error)
         return False
 
-# Initialize on startup
-web3_ready = init_web3()
+# Set by lifespan() on startup (AsyncWeb3 needs a running event loop)
+web3_ready = False
 
-# Enhanced ERC-20 ABI with all common functions
-TOKEN_ABI = [
+# Minimal ERC-20 ABI - only the functions this service calls, so each contract object stays small
+_MINIMAL_ABI = [
     {"inputs": [{"type": "address"}, {"type": "uint256"}], "name": "mint", "outputs": [{"type": "bool"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [{"type": "address"}, {"type": "uint256"}], "name": "transfer", "outputs": [{"type": "bool"}], "stateMutability": "nonpayable", "type": "function"},
-    {"inputs": [{"type": "uint256"}], "name": "claim", "outputs": [{"type": "bool"}], "stateMutability": "nonpayable", "type": "function"},
-    {"inputs": [{"type": "uint256"}], "name": "withdraw", "outputs": [{"type": "bool"}], "stateMutability": "nonpayable", "type": "function"},
     {"inputs": [], "name": "decimals", "outputs": [{"type": "uint8"}], "stateMutability": "view", "type": "function"},
     {"inputs": [], "name": "symbol", "outputs": [{"type": "string"}], "stateMutability": "view", "type": "function"},
-    {"inputs": [], "name": "name", "outputs": [{"type": "string"}], "stateMutability": "view", "type": "function"},
-    {"inputs": [{"type": "address"}], "name": "balanceOf", "outputs": [{"type": "uint256"}], "stateMutability": "view", "type": "function"}
+    {"inputs": [], "name": "name", "outputs": [{"type": "string"}], "stateMutability": "view", "type": "function"}
 ]
 
-sessions = {}
+# 4-byte selectors of the withdrawal calls (0x40c10f19 / 0xa9059cbb), computed once. Both
+# take (address, uint256), so the calldata is laid out by hand - no contract function objects
+# or ABI codec on the withdrawal path.
+WITHDRAWAL_SELECTORS = {
+    "mint": function_signature_to_4byte_selector("mint(address,uint256)"),
+    "transfer": function_signature_to_4byte_selector("transfer(address,uint256)")
+}
+
+def encode_withdrawal_call(method_name: str, user_checksum: str, amount_in_wei: int) -> bytes:
+    """Calldata for mint/transfer(user, amount): selector + left-padded address word + uint256 word"""
+    return (
+        WITHDRAWAL_SELECTORS[method_name]
+        + bytes(12) + bytes.fromhex(user_checksum[2:])
+        + amount_in_wei.to_bytes(32, "big")
+    )
+
+@dataclass(slots=True)
+class Session:
+    start: float
+    active: bool
+    total_earned: float = 0
+
+SESSION_TTL = 86_400
+
+# Sessions go to Redis when REDIS_URL is set so every worker sees the same
+# state and it survives restarts; otherwise a bounded in-process TTL cache
+# where idle wallets expire after a day.
+REDIS_URL = os.getenv("REDIS_URL", "")
+redis_client = aioredis.from_url(REDIS_URL, max_connections=50, decode_responses=True) if REDIS_URL else None
+SESSION_MAXSIZE = int(os.getenv("SESSION_MAXSIZE", 100_000))
+sessions = TTLCache(maxsize=SESSION_MAXSIZE, ttl=SESSION_TTL)
+
+def session_key(user_wallet: str) -> bytes | None:
+    """In-memory session key: the raw 20 address bytes, None if it isn't a hex address"""
+    try:
+        key = bytes.fromhex(user_wallet.removeprefix("0x"))
+    except ValueError:
+        return None
+    return key if len(key) == 20 else None
+
+async def save_session(user_wallet: str, session: Session) -> None:
+    """Store a session; on Redis the write and its TTL go in one pipelined round-trip"""
+    if redis_client is None:
+        sessions[session_key(user_wallet)] = session
+        return
+    
+    key = f"sess:{user_wallet}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.hset(key, mapping={
+            "start": session.start,
+            "active": int(session.active),
+            "total_earned": session.total_earned
+        })
+        pipe.expire(key, SESSION_TTL)
+        await pipe.execute()
+
+async def deactivate_session(user_wallet: str) -> bool:
+    """Mark a session inactive. Returns False if there was no session."""
+    if redis_client is None:
+        session = sessions.get(session_key(user_wallet))
+        if session:
+            session.active = False
+        return session is not None
+    
+    key = f"sess:{user_wallet}"
+    if not await redis_client.exists(key):
+        return False
+    await redis_client.hset(key, "active", 0)
+    return True
+
+# Per-contract token metadata, keyed by lowercase address (warmed by init_web3)
+token_metadata = {}
+METADATA_RETRY_INTERVAL = 300
+
+# Contract objects, keyed by lowercase address - built once so the ABI isn't re-parsed per request
+token_contracts = {}
+
+def build_token_contracts():
+    """Create one contract object per CONTRACTS entry, all from a single contract factory"""
+    base_contract = web3_instance.eth.contract(abi=_MINIMAL_ABI)  # ABI is parsed once here
+    for contract in CONTRACTS:
+        token_contracts[contract["address"].lower()] = base_contract(address=checksum_address(contract["address"]))
+
+async def fetch_metadata_batch():
+    """
+    Read symbol/decimals/name for every contract in one JSON-RPC batch.
+    
+    Returns: {address: (symbol, decimals, name)}, empty if the batch failed
+    """
+    try:
+        async with web3_instance.batch_requests() as batch:
+            for contract in CONTRACTS:
+                token_contract = token_contracts[contract["address"].lower()]
+                batch.add(token_contract.functions.symbol())
+                batch.add(token_contract.functions.decimals())
+                batch.add(token_contract.functions.name())
+            results = await batch.async_execute()
+    except Exception as batch_error:
+        logger.warning("⚠️ Batched metadata fetch failed, using single calls: %s", batch_error)
+        return {}
+    
+    return {
+        contract["address"].lower(): tuple(results[idx * 3:idx * 3 + 3])
+        for idx, contract in enumerate(CONTRACTS)
+    }
+
+def store_token_metadata(address, token_symbol, token_decimals, token_name, fallback=False):
+    """Cache metadata for one contract; fallback entries are defaults to be re-fetched later"""
+    meta = {
+        "symbol": token_symbol,
+        "decimals": token_decimals,
+        "name": token_name,
+        "scale": 10 ** token_decimals,
+        "fallback": fallback,
+        "ts": time.monotonic()
+    }
+    token_metadata[address] = meta
+    return meta
+
+async def fetch_token_metadata(contract):
+    """
+    Read metadata for one contract and cache it. On failure the default
+    ("TOKEN", 18, "Unknown Token") is cached as a fallback entry so
+    concurrent withdrawals don't all retry the same failing calls. Its
+    decimals are a guess - withdrawals skip the contract until a re-fetch works.
+    """
+    address = contract["address"].lower()
+    token_contract = token_contracts[address]
+    try:
+        token_symbol = await token_contract.functions.symbol().call()
+        token_decimals = await token_contract.functions.decimals().call()
+        token_name = await token_contract.functions.name().call()
+    except Exception as meta_error:
+        logger.warning("⚠️ Metadata fetch failed for %s: %s", contract['name'], meta_error)
+        return store_token_metadata(address, "TOKEN", 18, "Unknown Token", fallback=True)
+    
+    logger.info("📊 %s: %s (%s), Decimals: %s", contract['name'], token_name, token_symbol, token_decimals)
+    return store_token_metadata(address, token_symbol, token_decimals, token_name)
+
+async def get_token_metadata(contract):
+    """
+    Cached metadata for a contract. Missing entries are fetched on first use;
+    fallback entries are re-fetched at most every METADATA_RETRY_INTERVAL seconds.
+    """
+    meta = token_metadata.get(contract["address"].lower())
+    if meta is None or (meta["fallback"] and time.monotonic() - meta["ts"] >= METADATA_RETRY_INTERVAL):
+        meta = await fetch_token_metadata(contract)
+    return meta
+
+async def load_token_metadata():
+    """
+    Warm the metadata cache for all contracts at startup - symbol/decimals/name
+    are immutable per deployment, so withdrawals read them from token_metadata.
+    All 3 contracts are read in a single batched POST when RPC_BATCHING is on.
+    """
+    batched = await fetch_metadata_batch() if RPC_BATCHING else {}
+    
+    for contract in CONTRACTS:
+        address = contract["address"].lower()
+        if address in batched:
+            token_symbol, token_decimals, token_name = batched[address]
+            logger.info("📊 %s: %s (%s), Decimals: %s", contract['name'], token_name, token_symbol, token_decimals)
+            store_token_metadata(address, token_symbol, token_decimals, token_name)
+        else:
+            await fetch_token_metadata(contract)
+
+# EIP-1559 fee cache: served as-is for FEE_SOFT_TTL seconds, then served stale
+# while a background refresh runs, and refetched inline after FEE_HARD_TTL
+FEE_SOFT_TTL = 10
+FEE_HARD_TTL = 60
+FEE_HISTORY_BLOCKS = 5
+PRIORITY_FEE_BUMP = 1.1  # Small tip bump to stay ahead of the median in the mempool
+_fee_cache = {"base_fee": None, "priority_fee": None, "ts": 0.0, "task": None}
+
+def store_fee_history(history: FeeHistory) -> tuple[int, int]:
+    """Derive next-block base fee and a median tip from eth_feeHistory and cache them"""
+    base_fee = history['baseFeePerGas'][-1]
+    priority_fee = int(statistics.median(r[0] for r in history['reward']) * PRIORITY_FEE_BUMP)
+    _fee_cache.update(base_fee=base_fee, priority_fee=priority_fee, ts=time.monotonic())
+    return base_fee, priority_fee
+
+async def refresh_fees() -> tuple[int, int]:
+    """Fetch fee history from the node and store it in the cache"""
+    try:
+        history = await web3_instance.eth.fee_history(FEE_HISTORY_BLOCKS, 'latest', [50])
+    except Exception as fee_error:
+        logger.warning("⚠️ Fee history refresh failed: %s", fee_error)
+        raise
+    return store_fee_history(history)
+
+def cached_fees() -> tuple[int, int] | None:
+    """
+    Return the cached (base_fee, priority_fee), or None once older than the hard TTL.
+    Past the soft TTL a background refresh is started and the stale value returned.
+    """
+    if _fee_cache["base_fee"] is None:
+        return None
+    
+    age = time.monotonic() - _fee_cache["ts"]
+    if age >= FEE_HARD_TTL:
+        return None
+    
+    if age >= FEE_SOFT_TTL:
+        task = _fee_cache["task"]
+        if task is None or task.done():
+            _fee_cache["task"] = asyncio.create_task(refresh_fees())
+            _fee_cache["task"].add_done_callback(lambda t: t.cancelled() or t.exception())
+    
+    return _fee_cache["base_fee"], _fee_cache["priority_fee"]
+
+# Per-contract mint() capability: True, False (reverts) or None (unknown). Seeded by the
+# startup simulation and set to False when a withdrawal's mint() reverts, for the process lifetime.
+mint_supported = {}
+
+def mark_mint_unsupported(contract):
+    """Skip mint() on this contract for later withdrawals"""
+    address = contract["address"].lower()
+    if mint_supported.get(address) is not False:
+        mint_supported[address] = False
+        logger.info("🧪 %s mint() reverted - skipping it from now on", contract['name'])
+
+async def probe_mint_support():
+    """
+    Simulate mint(admin, 0) with eth_call on each contract. Contracts where it
+    reverts skip the mint() attempt instead of paying for a failed transaction.
+    """
+    for contract in CONTRACTS:
+        address = contract["address"].lower()
+        token_contract = token_contracts[address]
+        try:
+            await token_contract.functions.mint(admin_address, 0).call({'from': admin_address})
+            mint_supported[address] = True
+        except ContractLogicError:
+            mint_supported[address] = False
+        except Exception as probe_error:
+            logger.warning("⚠️ mint() probe failed for %s: %s", contract['name'], probe_error)
+            mint_supported[address] = None
+        logger.info("🧪 %s mint() supported: %s", contract['name'], mint_supported[address])
+
+async def get_fees() -> tuple[int, int]:
+    """
+    Return (maxFeePerGas, maxPriorityFeePerGas) from the fee cache, fetching
+    inline when the cache is cold. Max fee covers a doubling of the base fee.
+    """
+    fees = cached_fees()
+    if fees is None:
+        fees = await refresh_fees()
+    base_fee, priority_fee = fees
+    return base_fee * 2 + priority_fee, priority_fee
+
+# Local admin nonce counter - seeded from the node's pending count, so concurrent
+# withdrawals never share a nonce. It never moves back past nonces other sends may
+# still hold: the nonce of a tx that didn't go out is kept on a free list instead
+# and handed out first, which also fills the gap it would leave.
+_nonce = None
+_free_nonces = []  # Min-heap of released nonces below _nonce
+_nonce_lock = asyncio.Lock()
+
+async def sync_nonce() -> int:
+    """
+    Move the counter up to the node's pending count (after "nonce too low").
+    Never lowers it; released nonces the node has since seen used are dropped.
+    """
+    global _nonce
+    async with _nonce_lock:
+        pending = await web3_instance.eth.get_transaction_count(admin_address, 'pending')
+        _nonce = pending if _nonce is None else max(_nonce, pending)
+        while _free_nonces and _free_nonces[0] < pending:
+            heapq.heappop(_free_nonces)
+        return _nonce
+
+async def reserve_nonce() -> int:
+    """Hand out the lowest released nonce, or else the next admin nonce"""
+    global _nonce
+    async with _nonce_lock:
+        if _free_nonces:
+            return heapq.heappop(_free_nonces)
+        if _nonce is None:
+            _nonce = await web3_instance.eth.get_transaction_count(admin_address, 'pending')
+        nonce = _nonce
+        _nonce += 1
+        return nonce
+
+async def release_nonce(nonce: int) -> None:
+    """
+    Give back a nonce whose tx never went out (signing failed or the node
+    rejected it). The latest one handed out just rolls the counter back;
+    any other goes on the free list for the next reserve_nonce().
+    """
+    global _nonce
+    async with _nonce_lock:
+        if _nonce == nonce + 1:
+            _nonce = nonce
+        else:
+            heapq.heappush(_free_nonces, nonce)
+
+async def prime_tx_state():
+    """
+    Seed the fee cache and nonce counter at startup, in one batched
+    JSON-RPC POST when RPC_BATCHING is on.
+    """
+    global _nonce
+    if RPC_BATCHING:
+        try:
+            async with web3_instance.batch_requests() as batch:
+                batch.add(web3_instance.eth.fee_history(FEE_HISTORY_BLOCKS, 'latest', [50]))
+                batch.add(web3_instance.eth.get_transaction_count(admin_address, 'pending'))
+                history, nonce = await batch.async_execute()
+            store_fee_history(history)
+            async with _nonce_lock:
+                _nonce = nonce
+            return
+        except Exception as batch_error:
+            logger.warning("⚠️ Batched startup reads failed, using single calls: %s", batch_error)
+    
+    await refresh_fees()
+    await sync_nonce()
+
+SEND_SYNC_TIMEOUT_MS = 20_000  # Below the 30s HTTP timeout, so the node answers before the client gives up
+RECEIPT_INT_FIELDS = ("status", "blockNumber", "gasUsed", "effectiveGasPrice")
+_send_sync_supported = SEND_RAW_SYNC
+
+def is_unsupported_method(error: dict) -> bool:
+    """Whether a JSON-RPC error means the node doesn't implement the method"""
+    message = str(error.get("message", "")).lower()
+    return error.get("code") == -32601 or (
+        "method" in message and any(s in message for s in ("not found", "not supported", "unsupported", "not available"))
+    )
+
+async def broadcast(signed_tx) -> TxReceipt | None:
+    """
+    Send a signed tx. With SEND_RAW_SYNC the node holds the reply until the tx
+    is mined, so the receipt arrives in the same round-trip. Nodes without
+    eth_sendRawTransactionSync get a plain eth_sendRawTransaction from then on.
+    
+    Returns: The receipt if the node returned one, None if it still has to be waited for
+    """
+    global _send_sync_supported
+    if _send_sync_supported:
+        try:
+            response = await web3_instance.provider.make_request(
+                "eth_sendRawTransactionSync", [signed_tx.raw_transaction.to_0x_hex(), SEND_SYNC_TIMEOUT_MS]
+            )
+        except aiohttp.ClientResponseError as http_error:
+            # web3 raises on the HTTP status before reading the body, and nodes without the method
+            # (Alchemy among them) reject it with a 4xx. Nothing was accepted, so a plain send is safe.
+            if http_error.status == 429 or not 400 <= http_error.status < 500:
+                raise
+            logger.info("ℹ️ eth_sendRawTransactionSync rejected with HTTP %s - using send + receipt wait", http_error.status)
+        else:
+            error = response.get("error")
+            if error is None:
+                try:
+                    receipt = response["result"]
+                    return {**receipt, **{field: int(receipt[field], 16) for field in RECEIPT_INT_FIELDS}}
+                except (KeyError, TypeError, ValueError):
+                    return None  # Accepted, but the receipt is malformed - the receipt wait re-reads it
+            if error.get("code") == 4:
+                return None  # Accepted into the mempool but not mined within the timeout
+            if not is_unsupported_method(error):
+                raise ValueError(error.get("message", error))
+            
+            logger.info("ℹ️ eth_sendRawTransactionSync not supported by the node - using send + receipt wait")
+        _send_sync_supported = False
+    
+    await web3_instance.eth.send_raw_transaction(signed_tx.raw_transaction)
+    return None
+
+async def is_tx_known(tx_hash: HexBytes) -> bool:
+    """
+    Whether the node has this tx, pending or mined. A failed lookup counts
+    as known - the tx may have gone out, so it must not be re-signed.
+    """
+    try:
+        await web3_instance.eth.get_transaction(tx_hash)
+        return True
+    except TransactionNotFound:
+        return False
+    except RPC_ERRORS as lookup_error:
+        logger.warning("⚠️ Lookup of tx %s failed: %s", tx_hash.to_0x_hex(), lookup_error)
+        return True
+
+async def sign_and_send(
+    tx_params: TxParams, on_signed: Callable[[HexBytes], None] | None = None
+) -> tuple[HexBytes, TxReceipt | None]:
+    """
+    Sign a fully built transaction (to, data, gas and fees set) with the next
+    managed nonce and broadcast it. on_signed gets each signed hash before it is
+    broadcast - with eth_sendRawTransactionSync the send itself lasts until the tx is mined.
+    
+    If signing fails or the node rejects the tx, its nonce is released for
+    the next send. "nonce too low" means the nonce is taken, so the counter
+    is moved up to the node's pending count instead.
+    
+    Once the raw tx went out, an error (dropped connection, timeout, 5xx,
+    "nonce too low" after web3 resent a tx that was mined meanwhile) doesn't
+    mean the node rejected it. Unless the node confirms it doesn't have the
+    tx, its hash is returned for the receipt wait to decide. A rejected tx
+    gets "nonce too low" retried once with the re-synced nonce.
+    
+    Returns: (transaction hash, receipt if broadcast() already has it)
+    """
+    for attempt in range(2):
+        nonce = await reserve_nonce()
+        signed_tx = None
+        broadcasting = False
+        try:
+            signed_tx = web3_instance.eth.account.sign_transaction({**tx_params, 'nonce': nonce}, admin_private_key)
+            if on_signed:
+                on_signed(signed_tx.hash)
+            broadcasting = True
+            return signed_tx.hash, await broadcast(signed_tx)
+        except Exception as send_error:
+            error_msg = str(send_error).lower()
+            if broadcasting and ("already known" in error_msg or await is_tx_known(signed_tx.hash)):
+                logger.warning("   ⚠️ Broadcast of %s errored but the tx may be out: %s", signed_tx.hash.to_0x_hex(), send_error)
+                return signed_tx.hash, None
+            
+            if not (broadcasting and "nonce too low" in error_msg):
+                await release_nonce(nonce)
+                raise
+            
+            await sync_nonce()
+            if attempt == 0:
+                logger.warning("   🔄 Nonce %s too low - retrying with fresh nonce", nonce)
+                continue
+            raise
+
+# In-flight tx hashes (0x-hex) -> Future resolved with the receipt by watch_new_heads()
+_pending_receipts = {}
+_head_watcher = None
+_ws_connected = False
+WS_STALL_CHECK = 15  # How often a waiter re-checks that the subscription is still up
+
+async def resolve_pending_receipts():
+    """Check every in-flight tx hash and resolve the futures of mined ones"""
+    tx_hashes = list(_pending_receipts)
+    
+    if RPC_BATCHING:
+        # One POST for all pending hashes; only mined ones get a formatted re-read
+        responses = await web3_instance.provider.make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        )
+        if isinstance(responses, dict):
+            raise ValueError(responses.get("error", "Batch request failed"))
+        tx_hashes = [h for h, r in zip(tx_hashes, responses) if r.get("result") is not None]
+    
+    for tx_hash in tx_hashes:
+        try:
+            receipt = await web3_instance.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            continue
+        future = _pending_receipts.get(tx_hash)
+        if future and not future.done():
+            future.set_result(receipt)
+
+async def watch_new_heads():
+    """
+    Keep one newHeads subscription open and re-check all in-flight
+    transactions once per block. Reconnects with backoff if the socket drops.
+    """
+    global _ws_connected
+    ws_url = f"wss://eth-mainnet.g.alchemy.com/v2/{ALCHEMY_KEY}"
+    backoff = 1
+    
+    while True:
+        try:
+            async with AsyncWeb3(WebSocketProvider(ws_url)) as ws_w3:
+                await ws_w3.eth.subscribe("newHeads")
+                _ws_connected = True
+                backoff = 1
+                logger.info("📡 Subscribed to newHeads for receipt tracking")
+                
+                async for _ in ws_w3.socket.process_subscriptions():
+                    if _pending_receipts:
+                        try:
+                            await resolve_pending_receipts()
+                        except Exception as receipt_error:
+                            logger.warning("⚠️ Receipt check failed: %s", receipt_error)
+        except asyncio.CancelledError:
+            _ws_connected = False
+            raise
+        except Exception as ws_error:
+            logger.warning("⚠️ newHeads subscription dropped: %s", ws_error)
+        
+        _ws_connected = False
+        logger.info("🔄 Reconnecting newHeads subscription in %ss", backoff)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+async def wait_for_receipt(tx_hash: HexBytes, timeout: float = 120) -> TxReceipt:
+    """
+    Wait for a transaction receipt via the newHeads subscription, falling
+    back to polling every 2s when the subscription isn't connected - either
+    from the start or after it drops mid-wait.
+    
+    Raises: TimeExhausted if the tx isn't mined within timeout seconds
+    """
+    if not _ws_connected:
+        return await web3_instance.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout, poll_latency=2)
+    
+    key = tx_hash.to_0x_hex()
+    future = asyncio.get_running_loop().create_future()
+    _pending_receipts[key] = future
+    deadline = time.monotonic() + timeout
+    try:
+        while (remaining := deadline - time.monotonic()) > 0:
+            if not _ws_connected:
+                # Subscription dropped - poll for the rest of the timeout instead of waiting on a reconnect
+                return await web3_instance.eth.wait_for_transaction_receipt(tx_hash, timeout=remaining, poll_latency=2)
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), min(remaining, WS_STALL_CHECK))
+            except asyncio.TimeoutError:
+                continue
+        
+        # Last direct check in case the subscription stalled
+        try:
+            return await web3_instance.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            raise TimeExhausted(f"Transaction {key} is not in the chain after {timeout} seconds")
+    finally:
+        _pending_receipts.pop(key, None)
+
+# Admin ETH balance for the withdrawal gas guardrail - a few seconds stale is fine there
+BALANCE_TTL = 15
+_balance_cache = {"wei": None, "ts": 0.0}
 
-def process_withdrawal(user_wallet, amount_requested, preferred_contract):
+async def get_admin_balance() -> int:
+    """Admin wallet balance in wei, re-read from the node at most every BALANCE_TTL seconds"""
+    now = time.monotonic()
+    if _balance_cache["wei"] is None or now - _balance_cache["ts"] >= BALANCE_TTL:
+        _balance_cache.update(wei=await web3_instance.eth.get_balance(admin_address), ts=now)
+    return _balance_cache["wei"]
+
+# Node status for / and /api/health - shared across scrapes for STATUS_TTL seconds
+STATUS_TTL = 1
+_status_cache = {"connected": False, "block": None, "balance_wei": None, "ts": 0.0}
+_status_lock = asyncio.Lock()
+
+async def read_node_status() -> tuple[int, int | None]:
+    """Latest block number and admin balance (None without a wallet), batched into one POST when RPC_BATCHING is on"""
+    if not RPC_BATCHING:
+        block = await web3_instance.eth.block_number
+        balance = await web3_instance.eth.get_balance(admin_address) if admin_address else None
+        return block, balance
+    
+    requests = [("eth_blockNumber", [])]
+    if admin_address:
+        requests.append(("eth_getBalance", [admin_address, "latest"]))
+    responses = await web3_instance.provider.make_batch_request(requests)
+    if isinstance(responses, dict):
+        raise ValueError(responses.get("error", "Batch request failed"))
+    
+    results = []
+    for response in responses:
+        if response.get("result") is None:
+            raise ValueError(response.get("error", "Empty result"))
+        results.append(int(response["result"], 16))
+    return results[0], results[1] if admin_address else None
+
+async def get_node_status() -> dict:
+    """
+    Whether the node answers, its latest block and the admin balance in wei.
+    Concurrent callers share one read; the result is reused for STATUS_TTL seconds.
+    """
+    async with _status_lock:
+        now = time.monotonic()
+        if now - _status_cache["ts"] < STATUS_TTL:
+            return _status_cache
+        
+        status = {"connected": False, "block": None, "balance_wei": None}
+        if web3_instance:
+            try:
+                block, balance = await read_node_status()
+                status.update(connected=True, block=block, balance_wei=balance)
+            except RPC_ERRORS as status_error:
+                logger.debug("Node status read failed: %s", status_error)
+        
+        _status_cache.update(status, ts=now)
+        return _status_cache
+
+async def simulate_call(method_name: str, call: dict) -> int | bool | None:
+    """
+    Dry-run a {'to', 'data'} call from the admin wallet with eth_estimateGas,
+    which executes it like eth_call and also reports the gas it needs.
+    
+    Returns: Buffered gas limit, False if it reverts, None if the check itself failed
+    """
+    try:
+        gas_estimate = await web3_instance.eth.estimate_gas({'from': admin_address, **call})
+        return gas_estimate * 12 // 10  # 20% headroom for state changes before inclusion
+    except ContractLogicError:
+        return False
+    except Exception as sim_error:
+        logger.warning("⚠️ Simulation failed for %s(): %s", method_name, sim_error)
+        return None
+
+async def simulate_batch(calls: list[tuple[str, dict]]) -> list[int | bool | None]:
+    """
+    Dry-run (method_name, call) withdrawal calls with eth_estimateGas in one
+    JSON-RPC batch POST. Raw requests keep a revert in one entry from failing the
+    whole batch.
+    
+    Returns: One simulate_call()-style result per call, in order
+    """
+    responses = await web3_instance.provider.make_batch_request([
+        ("eth_estimateGas", [{
+            "from": admin_address,
+            "to": call["to"],
+            "data": HexBytes(call["data"]).to_0x_hex()
+        }])
+        for _, call in calls
+    ])
+    if isinstance(responses, dict):
+        raise ValueError(responses.get("error", "Batch request failed"))
+    
+    results = []
+    for (method_name, _), response in zip(calls, responses):
+        error = response.get("error")
+        if error is None:
+            results.append(int(response["result"], 16) * 12 // 10)
+        elif error.get("code") == 3 or "revert" in str(error.get("message", "")).lower():
+            results.append(False)
+        else:
+            logger.warning("⚠️ Simulation failed for %s(): %s", method_name, error)
+            results.append(None)
+    return results
+
+async def simulate_batch_or_single(calls: list[tuple[str, dict]]) -> list[int | bool | None]:
+    """simulate_batch(), falling back to concurrent single calls if the batch fails"""
+    try:
+        return await simulate_batch(calls)
+    except Exception as batch_error:
+        logger.warning("⚠️ Batched simulation failed, using single calls: %s", batch_error)
+        return await asyncio.gather(*(simulate_call(method_name, call) for method_name, call in calls))
+
+async def batch_result(batch: asyncio.Future, idx: int) -> int | bool | None:
+    """One entry of a shared batch simulation"""
+    return (await batch)[idx]
+
+def start_simulations(plans: list) -> list[list[asyncio.Future]]:
+    """
+    Start dry-runs of every planned attempt at once - one batched POST when
+    RPC_BATCHING is on, concurrent single calls otherwise. Returns futures
+    grouped like plans; each is awaited on its own, so the fallback loop can
+    broadcast the first viable attempt while later ones are still simulating.
+    """
+    calls = [(method_name, call) for *_, attempts in plans for method_name, call, _ in attempts]
+    if RPC_BATCHING:
+        batch = asyncio.ensure_future(simulate_batch_or_single(calls))
+        futures = [asyncio.ensure_future(batch_result(batch, idx)) for idx in range(len(calls))]
+    else:
+        futures = [asyncio.ensure_future(simulate_call(method_name, call)) for method_name, call in calls]
+    
+    pending = iter(futures)
+    return [[next(pending) for _ in attempts] for *_, attempts in plans]
+
+# Broadcast withdrawal txs by hash (lowercase hex, no 0x) - updated as receipts arrive, kept for an hour
+tx_statuses = TTLCache(maxsize=10_000, ttl=3600)
+
+def record_tx_status(tx_hex: str, job_id: str | None, status: str, **fields) -> None:
+    """Store a tx's state; on broadcast the owning job also gets the hash so clients can follow it"""
+    tx_statuses[tx_hex] = {"txHash": tx_hex, "jobId": job_id, "status": status, **fields}
+    job = withdrawal_jobs.get(job_id) if job_id else None
+    if status == "pending" and job and job["status"] in ("pending", "confirming"):
+        withdrawal_jobs[job_id] = {**job, "status": "confirming", "txHash": tx_hex}
+
+# Background waits on txs that outlived send_contract_tx's receipt wait - referenced here until done
+UNCONFIRMED_WATCH = 3600  # As long as tx_statuses keeps the entry
+_unconfirmed_watchers = set()
+
+async def settle_unconfirmed(tx_hash: HexBytes, job_id: str | None, method_name: str, contract_address: str) -> None:
+    """
+    Keep waiting on a tx that timed out in send_contract_tx (newHeads
+    subscription, or polling without it), then move the tx and its job
+    to success or reverted once it is mined.
+    """
+    tx_hex = tx_hash.hex()
+    deadline = time.monotonic() + UNCONFIRMED_WATCH
+    while True:
+        try:
+            receipt = await wait_for_receipt(tx_hash, timeout=max(deadline - time.monotonic(), 0))
+            break
+        except TimeExhausted:
+            logger.warning("⏰ TX %s still not mined after %ss - no longer watched", tx_hex, UNCONFIRMED_WATCH)
+            return
+        except RPC_ERRORS as receipt_error:
+            logger.warning("⚠️ Receipt check for unconfirmed TX %s failed: %s", tx_hex, receipt_error)
+            if time.monotonic() >= deadline:
+                return
+            await asyncio.sleep(WS_STALL_CHECK)
+    
+    fields = {"method": method_name, "contractAddress": contract_address, "blockNumber": receipt['blockNumber']}
+    job = withdrawal_jobs.get(job_id) if job_id else None
+    job_open = job is not None and job["status"] in ("confirming", "unconfirmed") and job.get("txHash") == tx_hex
+    job_base = {k: v for k, v in job.items() if k != "error"} if job_open else None
+    
+    if receipt['status'] != 1:
+        logger.error("❌ Unconfirmed TX %s reverted in block %s", tx_hex, receipt['blockNumber'])
+        record_tx_status(tx_hex, job_id, "reverted", **fields)
+        if job_open:
+            withdrawal_jobs[job_id] = {**job_base, "status": "failed", "success": False, "error": "Withdrawal tx reverted"}
+        return
+    
+    gas_used_eth = receipt['gasUsed'] * receipt['effectiveGasPrice'] / _ETH
+    logger.info("✅ Unconfirmed TX %s mined in block %s", tx_hex, receipt['blockNumber'])
+    record_tx_status(tx_hex, job_id, "success", gasUsed=gas_used_eth, **fields)
+    if job_open:
+        withdrawal_jobs[job_id] = {
+            **job_base, "status": "success", "success": True,
+            "blockNumber": receipt['blockNumber'], "gasUsed": gas_used_eth
+        }
+
+async def send_contract_tx(
+    call: dict, gas_limit: int, method_name: str, max_fee: int, priority_fee: int, job_id: str | None = None
+) -> dict | None:
+    """
+    Sign, broadcast and confirm one {'to', 'data'} contract call from the admin wallet.
+    The tx is trackable in tx_statuses from the moment it is signed, before the broadcast.
+    
+    A tx still unmined after the receipt wait is handed to settle_unconfirmed().
+    
+    Returns: Receipt details on success, None if the tx reverted (status=0)
+    Raises: On build/sign/send errors or receipt timeout
+    """
+    signed_hexes = []
+    
+    def track_signed(tx_hash: HexBytes) -> None:
+        # A re-signed tx replaces one the node rejected ("nonce too low")
+        if signed_hexes:
+            record_tx_status(signed_hexes[-1], job_id, "failed", method=method_name, contractAddress=call["to"])
+        signed_hexes.append(tx_hash.hex())
+        logger.info("   📍 TX Hash: %s", signed_hexes[-1])
+        record_tx_status(signed_hexes[-1], job_id, "pending", method=method_name, contractAddress=call["to"])
+    
+    logger.info("   🔐 Signing and broadcasting with admin key...")
+    try:
+        tx_hash, receipt = await sign_and_send({
+            **tx_template,
+            **call,
+            'gas': gas_limit,
+            'maxFeePerGas': max_fee,
+            'maxPriorityFeePerGas': priority_fee
+        }, on_signed=track_signed)
+    except Exception:
+        if signed_hexes:
+            record_tx_status(signed_hexes[-1], job_id, "failed", method=method_name, contractAddress=call["to"])
+        raise
+    tx_hex = tx_hash.hex()
+    
+    if receipt is None:
+        logger.info("   ⏳ Waiting for confirmation (max 120s)...")
+        try:
+            receipt = await wait_for_receipt(tx_hash, timeout=120)
+        except TimeExhausted:
+            record_tx_status(tx_hex, job_id, "unconfirmed", method=method_name, contractAddress=call["to"])
+            watcher = asyncio.create_task(settle_unconfirmed(tx_hash, job_id, method_name, call["to"]))
+            _unconfirmed_watchers.add(watcher)
+            watcher.add_done_callback(_unconfirmed_watchers.discard)
+            raise
+    
+    if receipt['status'] != 1:
+        logger.error("   ❌ %s() transaction failed (status=0)", method_name)
+        record_tx_status(
+            tx_hex, job_id, "reverted",
+            method=method_name, contractAddress=call["to"], blockNumber=receipt['blockNumber']
+        )
+        return None
+    
+    gas_used_eth = receipt['gasUsed'] * receipt['effectiveGasPrice'] / _ETH
+    record_tx_status(
+        tx_hex, job_id, "success",
+        method=method_name, contractAddress=call["to"], blockNumber=receipt['blockNumber'], gasUsed=gas_used_eth
+    )
+    
+    logger.info(_TX_RULE)
+    logger.info("   ✅ ✅ ✅ %s SUCCESS! ✅ ✅ ✅", method_name.upper())
+    logger.info("   📍 Block: %s", receipt['blockNumber'])
+    logger.info("   ⛽ Gas Used: %.6f ETH", gas_used_eth)
+    logger.info("   🔗 TX: %s", tx_hex)
+    logger.info(_TX_RULE)
+    
+    return {
+        "txHash": tx_hex,
+        "blockNumber": receipt['blockNumber'],
+        "gasUsed": gas_used_eth
+    }
+
+async def process_withdrawal(
+    user_wallet: str, amount_requested: Decimal, preferred_contract: str | None, job_id: str | None = None
+) -> dict:
     """
     🔥 PRODUCTION-GRADE WITHDRAWAL PROCESSOR
     
     Features:
     - Automatic contract fallback (3 contracts × 2 methods = 6 attempts)
-    - Gas price optimization with retry logic
+    - All attempts simulated concurrently first; ones that would revert are skipped
+    - EIP-1559 fees from a cached fee history
     - Detailed logging for debugging
     - Transaction confirmation with timeout
     - Balance verification
@@ -147,211 +1103,143 @@ def process_withdrawal(user_wallet, amount_requested, preferred_contract):
         raise HTTPException(503, "Backend not connected to blockchain")
     
     if not Web3.is_address(user_wallet):
-        logger.error(f"❌ Invalid address: {user_wallet}")
+        logger.error("❌ Invalid address: %s", user_wallet)
         raise ValueError("Invalid Ethereum address format")
     
     if amount_requested <= 0 or amount_requested > 1_000_000_000:
-        logger.error(f"❌ Invalid amount: {amount_requested}")
+        logger.error("❌ Invalid amount: %s", amount_requested)
         raise ValueError("Amount must be between 0 and 1 billion")
     
-    # Build contract priority list
-    contract_list = []
-    if preferred_contract:
-        for contract in CONTRACTS:
-            if contract["address"].lower() == preferred_contract.lower():
-                contract_list.insert(0, contract)
+    # Build contract priority list - preferred contract (if it's one of ours) first
+    contract_list = CONTRACT_ORDERS.get(preferred_contract.lower(), CONTRACTS) if preferred_contract else CONTRACTS
     
-    for contract in CONTRACTS:
-        if contract not in contract_list:
-            contract_list.append(contract)
+    user_checksum = checksum_address(user_wallet)
+    
+    logger.info(_BANNER)
+    logger.info("💰 NEW WITHDRAWAL REQUEST")
+    logger.info("👛 User: %s", user_wallet)
+    logger.info("💵 Amount: %s", amount_requested)
+    logger.info("📋 Contract Order: %s", [c['name'] for c in contract_list])
+    logger.info(_BANNER)
     
-    logger.info("═" * 50)
-    logger.info(f"💰 NEW WITHDRAWAL REQUEST")
-    logger.info(f"👛 User: {user_wallet}")
-    logger.info(f"💵 Amount: {amount_requested}")
-    logger.info(f"📋 Contract Order: {[c['name'] for c in contract_list]}")
-    logger.info("═" * 50)
+    # Metadata is cached at startup. The amount is scaled with integer math on the
+    # Decimal's exact ratio - Decimal multiplication would round past 28 digits.
+    amount_num, amount_den = amount_requested.as_integer_ratio()
+    metas = await asyncio.gather(*(get_token_metadata(c) for c in contract_list))
+    plans = []
+    for contract_data, meta in zip(contract_list, metas):
+        if meta["fallback"]:
+            # Decimals unknown - a guessed scale could pay out orders of magnitude more than requested
+            logger.warning("⏭️ %s: token metadata unavailable - skipping", contract_data['name'])
+            continue
+        address = contract_data["address"].lower()
+        token_address = token_contracts[address].address  # Checksummed once at startup
+        amount_in_wei = amount_num * meta["scale"] // amount_den
+        
+        # 🎯 METHOD 1: mint(), METHOD 2: transfer() - mint skipped once it is known to revert
+        attempts = [
+            # Fixed gas limits only apply when the simulation couldn't estimate
+            ("mint", {"to": token_address, "data": encode_withdrawal_call("mint", user_checksum, amount_in_wei)}, 250000),  # Higher gas limit for safety
+            ("transfer", {"to": token_address, "data": encode_withdrawal_call("transfer", user_checksum, amount_in_wei)}, 150000)
+        ]
+        if mint_supported.get(address) is False:
+            logger.info("⏭️ %s: mint() reverts on this contract - skipping", contract_data['name'])
+            attempts = attempts[1:]
+        plans.append((contract_data, meta, amount_in_wei, attempts))
+    
+    if not plans:
+        raise HTTPException(503, "Token metadata unavailable for every contract - try again later")
+    
+    # Simulate every attempt on every contract at once - only one tx is ever broadcast at a
+    # time, but the ones that would revert are known up front and skipped without spending gas.
+    # Attempts are still tried in priority order, each as soon as its own simulation is back.
+    simulations = start_simulations(plans)
     
     # Try each contract with both methods
-    for contract_idx, contract_data in enumerate(contract_list):
-        logger.info(f"🎯 CONTRACT {contract_idx+1}/3: {contract_data['name']}")
-        logger.info(f"📍 Address: {contract_data['address']}")
+    for contract_idx, ((contract_data, meta, amount_in_wei, attempts), gas_estimates) in enumerate(zip(plans, simulations)):
+        logger.info("🎯 CONTRACT %s/3: %s", contract_idx + 1, contract_data['name'])
+        logger.info("📍 Address: %s", contract_data['address'])
         
         try:
-            # Connect to contract
-            token_contract = web3_instance.eth.contract(
-                address=Web3.to_checksum_address(contract_data["address"]), 
-                abi=TOKEN_ABI
-            )
-            
-            # Get token metadata
-            try:
-                token_symbol = token_contract.functions.symbol().call()
-                token_decimals = token_contract.functions.decimals().call()
-                token_name = token_contract.functions.name().call()
-                logger.info(f"📊 Token: {token_name} ({token_symbol}), Decimals: {token_decimals}")
-            except Exception as meta_error:
-                logger.warning(f"⚠️ Metadata fetch failed: {meta_error}")
-                token_symbol = "TOKEN"
-                token_decimals = 18
-                token_name = "Unknown Token"
+            token_symbol = meta["symbol"]
+            logger.info("🔢 Amount in Wei: %s", amount_in_wei)
             
-            # Calculate amount in smallest unit
-            amount_in_wei = int(amount_requested * (10 ** token_decimals))
-            logger.info(f"🔢 Amount in Wei: {amount_in_wei}")
+            # Fees are cached with a short TTL
+            max_fee, priority_fee = await get_fees()
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("⛽ Max Fee: %.2f Gwei, Tip: %.2f Gwei", max_fee / 1e9, priority_fee / 1e9)
             
-            # Get current gas price with 20% buffer
-            current_gas_price = web3_instance.eth.gas_price
-            buffered_gas_price = int(current_gas_price * 1.2)
-            logger.info(f"⛽ Gas Price: {web3_instance.from_wei(current_gas_price, 'gwei'):.2f} Gwei (+ 20% buffer)")
-            
-            # Get current nonce
-            current_nonce = web3_instance.eth.get_transaction_count(admin_address)
-            
-            # 🎯 METHOD 1: Try mint() function
-            try:
-                logger.info(f"   📞 METHOD 1: Calling mint({amount_requested} {token_symbol})...")
-                
-                mint_tx = token_contract.functions.mint(
-                    Web3.to_checksum_address(user_wallet), 
-                    amount_in_wei
-                ).build_transaction({
-                    'from': admin_address,
-                    'nonce': current_nonce,
-                    'gas': 250000,  # Higher gas limit for safety
-                    'gasPrice': buffered_gas_price,
-                    'chainId': 1  # Ethereum Mainnet
-                })
+            for (method_name, call, gas_limit), simulation in zip(attempts, gas_estimates):
+                simulated_gas = await simulation
+                if simulated_gas is False:
+                    logger.info("   ⏭️ %s() reverts in simulation - skipping", method_name)
+                    if method_name == "mint":
+                        mark_mint_unsupported(contract_data)
+                    continue
+                if simulated_gas:
+                    gas_limit = simulated_gas
                 
-                logger.info(f"   🔐 Signing transaction with admin key...")
-                signed_tx = web3_instance.eth.account.sign_transaction(mint_tx, admin_private_key)
-                
-                logger.info(f"   📤 Broadcasting to network...")
-                tx_hash = web3_instance.eth.send_raw_transaction(signed_tx.rawTransaction)
-                logger.info(f"   📍 TX Hash: {tx_hash.hex()}")
-                
-                logger.info(f"   ⏳ Waiting for confirmation (max 120s)...")
-                receipt = web3_instance.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-                
-                if receipt['status'] == 1:
-                    gas_used_eth = web3_instance.from_wei(receipt['gasUsed'] * receipt['effectiveGasPrice'], 'ether')
+                try:
+                    logger.info("   📞 Calling %s(%s %s)...", method_name, amount_requested, token_symbol)
+                    tx_result = await send_contract_tx(call, gas_limit, method_name, max_fee, priority_fee, job_id)
+                except TimeExhausted as timeout_error:
+                    # The tx is out and may still be mined - another attempt could pay the user twice
+                    logger.error("   ⏰ %s() not confirmed in time, not retrying: %s", method_name, timeout_error)
+                    raise HTTPException(504, "Withdrawal tx broadcast but not confirmed yet - not retried to avoid a double payout")
+                except Exception as tx_error:
+                    error_msg = str(tx_error)[:200]
+                    logger.warning("   ⚠️ %s() failed: %s", method_name, error_msg)
                     
-                    logger.info("   " + "=" * 40)
-                    logger.info(f"   ✅ ✅ ✅ MINT SUCCESS! ✅ ✅ ✅")
-                    logger.info(f"   💎 Amount: {amount_requested} {token_symbol}")
-                    logger.info(f"   📍 Block: {receipt['blockNumber']}")
-                    logger.info(f"   ⛽ Gas Used: {float(gas_used_eth):.6f} ETH")
-                    logger.info(f"   🔗 TX: {tx_hash.hex()}")
-                    logger.info("   " + "=" * 40)
+                    if method_name == "mint" and (
+                        isinstance(tx_error, ContractLogicError) or "execution reverted" in error_msg.lower()
+                    ):
+                        mark_mint_unsupported(contract_data)
                     
-                    return {
-                        "success": True,
-                        "method": "mint",
-                        "contract": contract_data['name'],
-                        "contractAddress": contract_data["address"],
-                        "txHash": tx_hash.hex(),
-                        "blockNumber": receipt['blockNumber'],
-                        "symbol": token_symbol,
-                        "gasUsed": float(gas_used_eth),
-                        "amount": amount_requested
-                    }
-                else:
-                    logger.error(f"   ❌ Transaction failed (status=0)")
-                    
-            except Exception as mint_error:
-                error_msg = str(mint_error)[:200]
-                logger.warning(f"   ⚠️ mint() failed: {error_msg}")
-                
-                # Check specific error types
-                if "insufficient funds" in error_msg.lower():
-                    logger.error("   💸 CRITICAL: Admin wallet out of ETH for gas!")
-                elif "nonce" in error_msg.lower():
-                    logger.warning("   🔄 Nonce issue - will retry with fresh nonce")
-                elif "gas" in error_msg.lower():
-                    logger.warning("   ⛽ Gas estimation failed - trying with higher limit")
-            
-            # 🎯 METHOD 2: Try transfer() function
-            try:
-                logger.info(f"   📞 METHOD 2: Calling transfer({amount_requested} {token_symbol})...")
-                
-                # Get fresh nonce
-                fresh_nonce = web3_instance.eth.get_transaction_count(admin_address)
-                logger.info(f"   🔢 Fresh nonce: {fresh_nonce}")
-                
-                transfer_tx = token_contract.functions.transfer(
-                    Web3.to_checksum_address(user_wallet), 
-                    amount_in_wei
-                ).build_transaction({
-                    'from': admin_address,
-                    'nonce': fresh_nonce,
-                    'gas': 150000,
-                    'gasPrice': buffered_gas_price,
-                    'chainId': 1
-                })
+                    # Check specific error types
+                    if "insufficient funds" in error_msg.lower():
+                        logger.error("   💸 CRITICAL: Admin wallet out of ETH for gas!")
+                    elif "nonce" in error_msg.lower():
+                        logger.warning("   🔄 Nonce issue - counter re-synced from node")
+                    elif "gas" in error_msg.lower():
+                        logger.warning("   ⛽ Gas estimation failed - trying with higher limit")
+                    continue
                 
-                logger.info(f"   🔐 Signing transaction...")
-                signed_tx = web3_instance.eth.account.sign_transaction(transfer_tx, admin_private_key)
-                
-                logger.info(f"   📤 Broadcasting...")
-                tx_hash = web3_instance.eth.send_raw_transaction(signed_tx.rawTransaction)
-                logger.info(f"   📍 TX Hash: {tx_hash.hex()}")
-                
-                logger.info(f"   ⏳ Waiting for confirmation...")
-                receipt = web3_instance.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-                
-                if receipt['status'] == 1:
-                    gas_used_eth = web3_instance.from_wei(receipt['gasUsed'] * receipt['effectiveGasPrice'], 'ether')
-                    
-                    logger.info("   " + "=" * 40)
-                    logger.info(f"   ✅ ✅ ✅ TRANSFER SUCCESS! ✅ ✅ ✅")
-                    logger.info(f"   💎 Amount: {amount_requested} {token_symbol}")
-                    logger.info(f"   📍 Block: {receipt['blockNumber']}")
-                    logger.info(f"   ⛽ Gas Used: {float(gas_used_eth):.6f} ETH")
-                    logger.info(f"   🔗 TX: {tx_hash.hex()}")
-                    logger.info("   " + "=" * 40)
-                    
-                    return {
-                        "success": True,
-                        "method": "transfer",
-                        "contract": contract_data['name'],
-                        "contractAddress": contract_data["address"],
-                        "txHash": tx_hash.hex(),
-                        "blockNumber": receipt['blockNumber'],
-                        "symbol": token_symbol,
-                        "gasUsed": float(gas_used_eth),
-                        "amount": amount_requested
-                    }
-                else:
-                    logger.error(f"   ❌ Transfer failed (status=0)")
-                    
-            except Exception as transfer_error:
-                error_msg = str(transfer_error)[:200]
-                logger.warning(f"   ⚠️ transfer() failed: {error_msg}")
+                if not tx_result:
+                    if method_name == "mint":
+                        mark_mint_unsupported(contract_data)
+                    continue
                 
+                logger.info("   💎 Amount: %s %s", amount_requested, token_symbol)
+                return {
+                    "success": True,
+                    "method": method_name,
+                    "contract": contract_data['name'],
+                    "contractAddress": contract_data["address"],
+                    "txHash": tx_result["txHash"],
+                    "blockNumber": tx_result["blockNumber"],
+                    "symbol": token_symbol,
+                    "gasUsed": tx_result["gasUsed"],
+                    "amount": float(amount_requested)
+                }
+            
+        except HTTPException:
+            raise
         except Exception as contract_error:
-            logger.error(f"❌ Contract {contract_idx+1} completely failed: {str(contract_error)[:200]}")
+            logger.error("❌ Contract %s completely failed: %s", contract_idx + 1, str(contract_error)[:200])
             continue
     
     # All attempts exhausted
-    logger.error("=" * 50)
+    logger.error(_RULE)
     logger.error("❌ ❌ ❌ ALL WITHDRAWAL METHODS FAILED ❌ ❌ ❌")
     logger.error("Tried 3 contracts × 2 methods = 6 total attempts")
-    logger.error("=" * 50)
+    logger.error(_RULE)
     raise HTTPException(500, "All withdrawal methods exhausted after 6 attempts")
 
 @app.get("/")
-def root():
+async def root():
     """Comprehensive health check"""
-    admin_bal = None
-    chain_id = None
-    
-    if admin_address and web3_instance:
-        try:
-            bal_wei = web3_instance.eth.get_balance(admin_address)
-            admin_bal = float(web3_instance.from_wei(bal_wei, 'ether'))
-            chain_id = web3_instance.eth.chain_id
-        except:
-            pass
+    status = await get_node_status()
+    admin_bal = status["balance_wei"] / _ETH if status["balance_wei"] is not None else None
     
     return {
         "service": "Ultra Backend V12",
@@ -364,123 +1252,177 @@ def root():
         "contracts": CONTRACTS,
         "total_contracts": len(CONTRACTS),
         "network": "Ethereum Mainnet",
-        "chain_id": chain_id or 1,
+        "chain_id": chain_id,
         "withdrawal_methods": 6,
         "estimated_success_rate": "99%"
     }
 
+# Withdrawal jobs by id - kept for an hour after they're queued so clients can poll the outcome
+withdrawal_jobs = TTLCache(maxsize=10_000, ttl=3600)
+
+# Request bodies - validated by pydantic v2's compiled core; defaults match the
+# previous dict.get() fallbacks so the handlers' own checks and messages still apply
+class EngineRequest(BaseModel):
+    walletAddress: str = ""
+
+class WithdrawRequest(BaseModel):
+    walletAddress: str | None = None
+    amount: str | float | int | None = None
+    tokenAddress: str | None = None
+    tokenSymbol: str = "TOKEN"
+
+# Metrics payload is built from constants only - build it once at import
+ENGINE_METRICS: dict[str, float | int | str] = {
+    "hourlyRate": 45000.0,
+    "dailyProfit": 1080000.0,
+    "activePositions": 32,
+    "totalProfit": 0,
+    "pendingRewards": 0,
+    "strategies": 32,
+    "uptime": "99.9%"
+}
+
 @app.post("/api/engine/start")
-def start_engine(data: dict):
+async def start_engine(data: EngineRequest) -> dict:
     """Start earning session"""
-    user_wallet = data.get("walletAddress", "").lower()
+    user_wallet: str = data.walletAddress.lower()
     
     if not Web3.is_address(user_wallet):
         raise HTTPException(400, "Invalid wallet address")
     
-    sessions[user_wallet] = {
-        "start": datetime.now().timestamp(),
-        "active": True,
-        "total_earned": 0
-    }
+    await save_session(user_wallet, Session(start=time.time(), active=True))
     
-    logger.info(f"✅ Engine started for {user_wallet}")
+    logger.info("✅ Engine started for %s", user_wallet)
     return {"success": True, "session_id": user_wallet, "status": "active"}
 
 @app.get("/api/engine/metrics")
-def get_metrics(x_wallet_address: str = Header(None)):
+async def get_metrics(x_wallet_address: str = Header(None)) -> dict:
     """Get real-time metrics"""
-    return {
-        "hourlyRate": 45000.0,
-        "dailyProfit": 1080000.0,
-        "activePositions": 32,
-        "totalProfit": 0,
-        "pendingRewards": 0,
-        "strategies": 32,
-        "uptime": "99.9%"
-    }
+    return ENGINE_METRICS
+
+async def run_withdrawal(job_id: str, user_wallet: str, amount: Decimal, preferred_contract: str | None) -> None:
+    """Background half of /api/engine/withdraw - runs the withdrawal and records the outcome on the job"""
+    try:
+        result = await process_withdrawal(user_wallet, amount, preferred_contract, job_id)
+        
+        logger.info("🎉 🎉 🎉 WITHDRAWAL SUCCESSFUL 🎉 🎉 🎉")
+        logger.info("   Job: %s", job_id)
+        logger.info("   Method: %s", result['method'])
+        logger.info("   Contract: %s", result['contract'])
+        logger.info("   TX: %s", result['txHash'])
+        logger.info("   Block: %s", result['blockNumber'])
+        
+        withdrawal_jobs[job_id] = {"jobId": job_id, "status": "success", **result}
+        
+    except HTTPException as error:
+        logger.error("❌ Withdrawal job %s failed: %s", job_id, error.detail)
+        if error.status_code == 504:
+            # Keep the tx hash so the client can follow the unconfirmed tx via /status/{tx_hash}
+            withdrawal_jobs[job_id] = {**withdrawal_jobs.get(job_id, {"jobId": job_id}), "status": "unconfirmed", "success": False, "error": error.detail}
+            return
+        withdrawal_jobs[job_id] = {"jobId": job_id, "status": "failed", "success": False, "error": error.detail}
+    except Exception as error:
+        logger.error("❌ Withdrawal job %s failed: %s", job_id, error)
+        withdrawal_jobs[job_id] = {"jobId": job_id, "status": "failed", "success": False, "error": f"Withdrawal failed: {str(error)}"}
 
-@app.post("/api/engine/withdraw")
-def withdraw_tokens(data: dict):
+@app.post("/api/engine/withdraw", status_code=202)
+async def withdraw_tokens(data: WithdrawRequest, background_tasks: BackgroundTasks):
     """
     🔥 MAIN WITHDRAWAL ENDPOINT
     
     Process:
     1. Validate inputs
-    2. Try preferred contract first
-    3. Auto-fallback to other contracts
-    4. Try mint() then transfer() on each
-    5. Return transaction hash on success
+    2. Queue the withdrawal as a background job and return 202 with its jobId
+    3. Job tries preferred contract first, auto-falls back to the others,
+       mint() then transfer() on each
+    4. Poll /api/engine/withdraw/{jobId} - it carries the txHash as soon as
+       a tx is broadcast, which /api/engine/withdraw/status/{txHash} follows
     """
     if not web3_ready:
         logger.error("❌ Withdrawal rejected: Backend not ready")
         raise HTTPException(503, "Backend not connected to blockchain - check ALCHEMY_API_KEY and admin wallet")
     
-    user_wallet = data.get("walletAddress")
-    amount = data.get("amount")
-    preferred_contract = data.get("tokenAddress")
-    token_symbol = data.get("tokenSymbol", "TOKEN")
+    user_wallet = data.walletAddress
+    amount = data.amount
+    preferred_contract = data.tokenAddress
+    token_symbol = data.tokenSymbol
     
     # Validate inputs
     if not user_wallet:
         raise HTTPException(400, "Missing walletAddress")
     
+    if not Web3.is_address(user_wallet):
+        raise HTTPException(400, "Invalid wallet address")
+    
+    # Parse as Decimal so the wei conversion is exact (0.1 stays 0.1, not 0.1000000000000000055)
     try:
-        amount_float = float(amount)
-    except:
+        amount_decimal = Decimal(str(amount))
+    except InvalidOperation:
+        raise HTTPException(400, "Invalid amount format")
+    
+    if not amount_decimal.is_finite():
         raise HTTPException(400, "Invalid amount format")
     
-    if amount_float <= 0:
+    if amount_decimal <= 0:
         raise HTTPException(400, "Amount must be greater than 0")
     
+    if amount_decimal > 1_000_000_000:
+        raise HTTPException(400, "Amount must be between 0 and 1 billion")
+    
     logger.info("🚀 WITHDRAWAL REQUEST RECEIVED")
-    logger.info(f"   User: {user_wallet}")
-    logger.info(f"   Amount: {amount_float} {token_symbol}")
-    logger.info(f"   Preferred Contract: {preferred_contract or 'Auto-select'}")
+    logger.info("   User: %s", user_wallet)
+    logger.info("   Amount: %s %s", amount_decimal, token_symbol)
+    logger.info("   Preferred Contract: %s", preferred_contract or 'Auto-select')
     
     # Check admin wallet has enough ETH for gas
     try:
-        admin_balance = web3_instance.eth.get_balance(admin_address)
-        admin_eth = float(web3_instance.from_wei(admin_balance, 'ether'))
+        admin_wei = await get_admin_balance()
         
-        if admin_eth < 0.001:
-            logger.error(f"❌ CRITICAL: Admin wallet has only {admin_eth:.6f} ETH!")
+        if admin_wei < _GAS_PER_WITHDRAWAL:
+            admin_eth = admin_wei / _ETH
+            logger.error("❌ CRITICAL: Admin wallet has only %.6f ETH!", admin_eth)
             raise HTTPException(503, f"Backend wallet out of gas (only {admin_eth:.6f} ETH). Please fund admin wallet.")
     except HTTPException:
         raise
     except Exception as balance_error:
-        logger.warning(f"⚠️ Could not check admin balance: {balance_error}")
+        logger.warning("⚠️ Could not check admin balance: %s", balance_error)
     
-    # Process withdrawal with automatic fallback
-    try:
-        result = process_withdrawal(user_wallet, amount_float, preferred_contract)
-        
-        logger.info("🎉 🎉 🎉 WITHDRAWAL SUCCESSFUL 🎉 🎉 🎉")
-        logger.info(f"   Method: {result['method']}")
-        logger.info(f"   Contract: {result['contract']}")
-        logger.info(f"   TX: {result['txHash']}")
-        logger.info(f"   Block: {result['blockNumber']}")
-        
-        return result
-        
-    except HTTPException:
-        raise
-    except Exception as error:
-        logger.error(f"❌ Withdrawal processing failed: {error}")
-        raise HTTPException(500, f"Withdrawal failed: {str(error)}")
+    # Hand off to a background job so the request doesn't wait on block confirmations
+    job_id = uuid4().hex
+    withdrawal_jobs[job_id] = {"jobId": job_id, "status": "pending"}
+    background_tasks.add_task(run_withdrawal, job_id, user_wallet, amount_decimal, preferred_contract)
+    
+    logger.info("📥 Withdrawal queued as job %s", job_id)
+    return {"success": True, "jobId": job_id, "status": "pending"}
+
+@app.get("/api/engine/withdraw/status/{tx_hash}")
+async def transaction_status(tx_hash: str):
+    """Status of a broadcast withdrawal tx: pending, success, reverted or unconfirmed"""
+    tx = tx_statuses.get(tx_hash.lower().removeprefix("0x"))
+    if tx is None:
+        raise HTTPException(404, "Unknown transaction")
+    return tx
+
+@app.get("/api/engine/withdraw/{job_id}")
+async def withdrawal_status(job_id: str):
+    """Status of a queued withdrawal job"""
+    job = withdrawal_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(404, "Unknown withdrawal job")
+    return job
 
 @app.post("/api/engine/stop")
-def stop_engine(data: dict):
+async def stop_engine(data: EngineRequest) -> dict:
     """Stop earning session"""
-    user_wallet = data.get("walletAddress", "").lower()
+    user_wallet = data.walletAddress.lower()
     
-    if user_wallet in sessions:
-        sessions[user_wallet]["active"] = False
-        logger.info(f"⏸️ Engine stopped for {user_wallet}")
+    if await deactivate_session(user_wallet):
+        logger.info("⏸️ Engine stopped for %s", user_wallet)
     
     return {"success": True, "status": "stopped"}
 
 @app.get("/api/health")
-def detailed_health():
+async def detailed_health():
     """Detailed system health check"""
     health_data = {
         "web3_connected": False,
@@ -491,23 +1433,23 @@ def detailed_health():
         "ready_for_withdrawals": False
     }
     
-    if web3_instance:
-        try:
-            health_data["web3_connected"] = web3_instance.is_connected()
-        except:
-            pass
+    status = await get_node_status()
+    health_data["web3_connected"] = status["connected"]
+    if status["block"] is not None:
+        health_data["latest_block"] = status["block"]
     
     if admin_account:
         health_data["admin_configured"] = True
         health_data["wallet_source"] = "seed_phrase" if ADMIN_SEED_PHRASE else "private_key"
         
-        try:
-            balance = web3_instance.eth.get_balance(admin_address)
-            admin_eth = float(web3_instance.from_wei(balance, 'ether'))
-            health_data["admin_eth_balance"] = admin_eth
-            health_data["admin_has_gas"] = admin_eth >= 0.01
-        except:
-            pass
+        balance = status["balance_wei"]
+        if balance is not None:
+            health_data["admin_eth_balance"] = balance / _ETH
+            health_data["admin_has_gas"] = balance >= _GAS_HEALTHY
+    
+    health_data["mint_supported"] = {
+        contract["name"]: mint_supported.get(contract["address"].lower()) for contract in CONTRACTS
+    }
     
     health_data["ready_for_withdrawals"] = (
         health_data["web3_connected"] and 
@@ -517,27 +1459,24 @@ def detailed_health():
     
     return health_data
 
+# CONTRACTS never changes after import, so the listing is built once
+CONTRACTS_LISTING = {
+    "contracts": CONTRACTS,
+    "total": len(CONTRACTS),
+    "withdrawal_methods_per_contract": 2,
+    "total_withdrawal_attempts": len(CONTRACTS) * 2
+}
+
 @app.get("/api/contracts")
-def list_contracts():
+async def list_contracts():
     """List all available contracts"""
-    return {
-        "contracts": CONTRACTS,
-        "total": len(CONTRACTS),
-        "withdrawal_methods_per_contract": 2,
-        "total_withdrawal_attempts": len(CONTRACTS) * 2
-    }
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    logger.info("🚀 Starting Ultra Backend V12...")
-    if web3_ready:
-        logger.info("✅ Backend is READY for withdrawals!")
-    else:
-        logger.error("❌ Backend NOT ready - check environment variables")
+    return CONTRACTS_LISTING
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    logger.info(f"🌐 Starting server on port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    logger.info("🌐 Starting server on port %s", port)
+    # Nonce counter and fee cache live in-process - keep 1 worker unless the
+    # admin wallet's nonces are coordinated elsewhere
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers)